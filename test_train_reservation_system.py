@@ -0,0 +1,196 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import train_reservation_system
+from train_reservation_system import ReservationSystem, Train
+
+
+def run_quietly(func, *inputs):
+    """Calls func with the given lines fed to input() and its output discarded."""
+    with mock.patch("builtins.input", side_effect=list(inputs)), \
+            contextlib.redirect_stdout(io.StringIO()):
+        func()
+
+
+def book(system, train_no, *names):
+    """Books one ticket for the given passengers and returns its PNR."""
+    train = system.trains[train_no]
+    inputs = [train.source, train.destination, train_no, str(len(names))]
+    for name in names:
+        inputs += [name, "30"]
+    before = set(system.tickets)
+    run_quietly(system.book_ticket, *inputs)
+    (pnr,) = set(system.tickets) - before
+    return pnr
+
+
+class RouteIndexTest(unittest.TestCase):
+
+    def test_replaced_train_leaves_old_route(self):
+        system = ReservationSystem()
+        with contextlib.redirect_stdout(io.StringIO()):
+            system.add_train(Train("1", "Old", "A", "B", 10))
+            system.display_trains("A", "B")
+            system.add_train(Train("1", "New", "A", "C", 10))
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                system.display_trains("A", "B")
+        self.assertIn("No trains found", output.getvalue())
+        self.assertEqual([t.name for t in system.trains_by_route[("a", "c")]], ["New"])
+        self.assertNotIn(("a", "b"), system.trains_by_route)
+
+    def test_total_available_follows_replaced_train(self):
+        system = ReservationSystem()
+        with contextlib.redirect_stdout(io.StringIO()):
+            system.add_train(Train("1", "Old", "A", "B", 5))
+            system.add_train(Train("2", "Other", "A", "C", 10))
+            system.add_train(Train("1", "New", "A", "B", 100))
+        self.assertEqual(system.total_available(), 110)
+        book(system, "1", "a", "b")
+        self.assertEqual(system.total_available(), 108)
+
+    def test_train_with_active_bookings_is_not_replaced(self):
+        fd, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, db_path)
+        system = ReservationSystem(db_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            system.add_train(Train("1", "Express", "A", "B", 5))
+        pnr = book(system, "1", "a", "b")
+        original = system.trains["1"]
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            system.add_train(Train("1", "Bigger", "A", "B", 100))
+        self.assertIn("cannot be replaced", output.getvalue())
+        self.assertIs(system.trains["1"], original)
+
+        run_quietly(system.cancel_ticket, pnr)
+        with contextlib.redirect_stdout(io.StringIO()):
+            system.add_train(Train("1", "Bigger", "A", "B", 100))
+        self.assertEqual(system.trains["1"].available_seats, 100)
+        system.db.close()
+
+        system = ReservationSystem(db_path)
+        self.assertEqual(system.trains["1"].available_seats, 100)
+        system.db.close()
+
+
+class CancellationTest(unittest.TestCase):
+
+    def test_cancellation_releases_seats_and_promotes_in_order(self):
+        system = ReservationSystem()
+        with contextlib.redirect_stdout(io.StringIO()):
+            system.add_train(Train("1", "Express", "A", "B", 2))
+        confirmed = book(system, "1", "a", "b")
+        withdrawn = book(system, "1", "c")
+        first = book(system, "1", "d")
+        second = book(system, "1", "e")
+        run_quietly(system.cancel_ticket, withdrawn)
+        run_quietly(system.cancel_ticket, confirmed)
+
+        self.assertEqual(system.tickets[first].status, "Confirmed")
+        self.assertEqual(system.tickets[second].status, "Confirmed")
+        self.assertEqual(system.tickets[withdrawn].status, "Cancelled")
+        self.assertEqual(system.trains["1"].available_seats, 0)
+        self.assertEqual(system.total_available(), 0)
+
+    def test_waiting_positions_skip_tickets_cancelled_mid_queue(self):
+        system = ReservationSystem()
+        with contextlib.redirect_stdout(io.StringIO()):
+            system.add_train(Train("1", "Express", "A", "B", 1))
+        book(system, "1", "a")
+        w1 = book(system, "1", "w1")
+        w2 = book(system, "1", "w2")
+        w3 = book(system, "1", "w3")
+        run_quietly(system.cancel_ticket, w2)
+
+        output = io.StringIO()
+        with mock.patch("builtins.input", side_effect=[w3]), contextlib.redirect_stdout(output):
+            system.check_pnr_status()
+        self.assertIn("Current Waiting List Position: 2", output.getvalue())
+        train = system.trains["1"]
+        self.assertEqual(train.waiting_position(w1), 1)
+        w4 = book(system, "1", "w4")
+        self.assertEqual(train.waiting_position(w4), 3)
+
+
+class BatchPassengerInputTest(unittest.TestCase):
+
+    def setUp(self):
+        self.system = ReservationSystem()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.system.add_train(Train("1", "Express", "A", "B", 10))
+
+    def test_block_is_read_up_to_blank_line(self):
+        lines = ["a,1", "b,2", "c,3", "d,4", ""]
+        with mock.patch("builtins.input", side_effect=["A", "B", "1", "4"] + lines + ["next prompt"]) as fake, \
+                contextlib.redirect_stdout(io.StringIO()):
+            self.system.book_ticket()
+        self.assertEqual(fake.call_count, 4 + len(lines))
+        (ticket,) = self.system.tickets.values()
+        self.assertEqual([p.name for p in ticket.passengers], ["a", "b", "c", "d"])
+
+    def test_extra_lines_are_rejected(self):
+        lines = ["a,1", "b,2", "c,3", "d,4", "e,5", ""]
+        output = io.StringIO()
+        with mock.patch("builtins.input", side_effect=["A", "B", "1", "4"] + lines), \
+                contextlib.redirect_stdout(output):
+            self.system.book_ticket()
+        self.assertIn("Expected 4 passengers, got 5", output.getvalue())
+        self.assertEqual(self.system.tickets, {})
+
+
+class PersistenceTest(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+
+    def tearDown(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def reopen(self, system):
+        system.db.close()
+        return ReservationSystem(self.db_path)
+
+    def test_waiting_list_order_survives_restarts(self):
+        system = ReservationSystem(self.db_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            system.add_train(Train("1", "Express", "A", "B", 1))
+        book(system, "1", "confirmed")
+        w1 = book(system, "1", "w1")
+        w2 = book(system, "1", "w2")
+        w3 = book(system, "1", "w3")
+        run_quietly(system.cancel_ticket, w1)
+        run_quietly(system.cancel_ticket, w2)
+
+        system = self.reopen(system)
+        w4 = book(system, "1", "w4")
+
+        system = self.reopen(system)
+        self.assertEqual(list(system.trains["1"].waiting_list), [w3, w4])
+        system.db.close()
+
+    def test_restoring_tickets_does_not_consume_pnrs(self):
+        system = ReservationSystem(self.db_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            system.add_train(Train("1", "Express", "A", "B", 5))
+        pnr = book(system, "1", "a")
+        system.db.close()
+
+        with mock.patch.object(train_reservation_system, "_pnr_counter") as counter:
+            system = ReservationSystem(self.db_path)
+        self.assertEqual(system.tickets[pnr].status, "Confirmed")
+        counter.__next__.assert_not_called()
+        system.db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
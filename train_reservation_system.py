@@ -1,85 +1,348 @@
 import random
 import datetime
+import itertools
+import re
+import sqlite3
+import sys
+from array import array
+from collections import deque
+from typing import NamedTuple, Optional
+
+# SQLite file used by the CLI to persist trains and tickets between runs
+DB_PATH = "reservations.db"
+
+# Bookings with more passengers than this read all details in one block
+BATCH_PASSENGER_THRESHOLD = 3
+
+# Pre-compiled patterns for validating numeric menu and count input
+_MENU_CHOICE_RE = re.compile(r"^[1-5]$")
+_POSITIVE_INT_RE = re.compile(r"^[1-9][0-9]*$")
+
+# Module-level counter for PNR generation
+_pnr_counter = itertools.count(random.randint(1000000, 9999999))
+
+# Lightweight record for a single passenger on a ticket
+class Passenger(NamedTuple):
+    name: str
+    age: str
+
+def normalize_station(name: str) -> str:
+    """Returns the case-insensitive lookup key for a station name."""
+    # Interned so that route keys for the same station share one string object
+    return sys.intern(name.strip().lower())
 
 class Train:
     """
     Represents a train with its details.
     """
-    def __init__(self, train_no, name, source, destination, total_seats):
-        self.train_no = train_no
-        self.name = name
-        self.source = source
-        self.destination = destination
-        self.total_seats = total_seats
-        self.available_seats = total_seats
-        # Waiting list: Stores PNRs of tickets that are not confirmed.
-        self.waiting_list = []
-
-    def get_details(self):
+    __slots__ = ("train_no", "name", "source", "destination",
+                 "_source_lc", "_destination_lc", "total_seats", "available_seats",
+                 "_seat_array", "_seat_slot", "waiting_list", "waiting_index", "_wl_seq", "_wl_live")
+
+    def __init__(self, train_no: str, name: str, source: str, destination: str, total_seats: int) -> None:
+        self.train_no: str = train_no
+        self.name: str = name
+        self.source: str = sys.intern(source)
+        self.destination: str = sys.intern(destination)
+        # Lowercased station names, used as the route lookup key
+        self._source_lc: str = normalize_station(source)
+        self._destination_lc: str = normalize_station(destination)
+        self.total_seats: int = total_seats
+        self.available_seats: int = total_seats
+        # Slot in the reservation system's seat array, mirrored on every seat change
+        self._seat_array: Optional[array[int]] = None
+        self._seat_slot: int = 0
+        # Waiting list: FIFO queue of PNRs of tickets that are not confirmed.
+        self.waiting_list: deque[str] = deque()
+        # PNR -> insertion sequence number, so positions are found without a scan
+        self.waiting_index: dict[str, int] = {}
+        self._wl_seq: int = 0
+        # Fenwick tree over sequence numbers counting entries still waiting,
+        # so positions stay exact when a ticket leaves from the middle
+        self._wl_live: list[int] = [0]
+
+    def get_details(self) -> str:
         """Returns a formatted string of the train's details."""
         return (f"Train No: {self.train_no} | Name: {self.name} | "
                 f"From: {self.source} To: {self.destination}")
 
-    def check_availability(self):
+    def check_availability(self) -> int:
         """Returns the number of available seats."""
         return self.available_seats
 
+    def reserve_seats(self, seat_count: int) -> None:
+        """Takes seats for a confirmed ticket from availability."""
+        self.available_seats -= seat_count
+        if self._seat_array is not None:
+            self._seat_array[self._seat_slot] = self.available_seats
+
+    def release_seats(self, seat_count: int) -> None:
+        """Returns the seats held by a cancelled confirmed ticket."""
+        self.available_seats += seat_count
+        if self._seat_array is not None:
+            self._seat_array[self._seat_slot] = self.available_seats
+
+    def _live_count(self, seq: int) -> int:
+        """Returns how many waiting entries have a sequence number up to seq."""
+        i = seq + 1
+        total = 0
+        while i > 0:
+            total += self._wl_live[i]
+            i -= i & -i
+        return total
+
+    def _mark_left(self, seq: int) -> None:
+        """Records that the entry with this sequence number is no longer waiting."""
+        i = seq + 1
+        while i < len(self._wl_live):
+            self._wl_live[i] -= 1
+            i += i & -i
+
+    def add_to_waiting_list(self, pnr: str) -> None:
+        """Appends a PNR to the end of the waiting list."""
+        if not self.waiting_list:
+            # Start numbering afresh whenever the queue drains
+            self._wl_seq = 0
+            self._wl_live = [0]
+        self.waiting_list.append(pnr)
+        self.waiting_index[pnr] = self._wl_seq
+        # New node covers (i - lowbit(i), i]; everything before it is live-counted already
+        i = self._wl_seq + 1
+        self._wl_live.append(1 + self._live_count(i - 2) - self._live_count(i - (i & -i) - 1))
+        self._wl_seq += 1
+
+    def remove_from_waiting_list(self, pnr: str) -> None:
+        """Withdraws a PNR from the waiting list; its queue entry is dropped once it reaches the head."""
+        self._mark_left(self.waiting_index.pop(pnr))
+
+    def next_waiting(self) -> Optional[str]:
+        """Returns the PNR at the head of the waiting list, or None if it is empty."""
+        while self.waiting_list:
+            pnr = self.waiting_list[0]
+            if pnr in self.waiting_index:
+                return pnr
+            # Entry withdrawn while waiting
+            self.waiting_list.popleft()
+        return None
+
+    def pop_waiting_list(self) -> str:
+        """Removes and returns the PNR at the head of the waiting list."""
+        pnr = self.waiting_list.popleft()
+        self._mark_left(self.waiting_index.pop(pnr))
+        return pnr
+
+    def waiting_position(self, pnr: str) -> int:
+        """Returns the 1-based waiting list position of a PNR."""
+        return self._live_count(self.waiting_index[pnr])
+
 class Ticket:
     """
     Represents a ticket with its PNR, passengers, and status.
     """
-    # Class-level counter for PNR generation
-    pnr_counter = random.randint(1000000, 9999999)
-
-    def __init__(self, train, passengers):
-        Ticket.pnr_counter += 1
-        self.pnr = str(Ticket.pnr_counter)
-        self.train = train
-        self.passengers = passengers  # List of passenger dictionaries
-        self.status = "Confirmed" if train.check_availability() >= len(passengers) else "Waiting"
-        self.booking_date = datetime.datetime.now()
-
-    def get_details(self):
+    __slots__ = ("pnr", "train", "passengers", "seat_count", "status", "booking_date", "_booking_str",
+                 "_details_cache", "_details_status")
+
+    def __init__(self, train: Train, passengers: list[Passenger], pnr: Optional[str] = None,
+                 status: Optional[str] = None, booking_date: Optional[datetime.datetime] = None) -> None:
+        # pnr, status and booking_date are only passed when restoring a stored ticket
+        self.pnr: str = pnr if pnr is not None else str(next(_pnr_counter))
+        self.train: Train = train
+        self.passengers: list[Passenger] = passengers
+        self.seat_count: int = len(passengers)
+        if status is None:
+            status = "Confirmed" if train.check_availability() >= self.seat_count else "Waiting"
+        self.status: str = status
+        self.booking_date: datetime.datetime = booking_date if booking_date is not None else datetime.datetime.now()
+        # Booking date never changes, so format it once
+        self._booking_str: str = self.booking_date.strftime('%Y-%m-%d %H:%M:%S')
+        # Last rendered details and the status they were rendered with
+        self._details_cache: Optional[str] = None
+        self._details_status: Optional[str] = None
+
+    def get_details(self) -> str:
         """Returns a formatted string of the ticket's details."""
-        passenger_details = "\n".join([f"  - {p['name']} ({p['age']})" for p in self.passengers])
-        return (
+        # Only the status changes after booking, so reuse the last rendering
+        if self._details_cache is not None and self._details_status == self.status:
+            return self._details_cache
+        passenger_details = "\n".join(f"  - {p.name} ({p.age})" for p in self.passengers)
+        train = self.train
+        self._details_cache = (
             f"-----------------------------------\n"
             f"PNR: {self.pnr}\n"
-            f"Train: {self.train.name} ({self.train.train_no})\n"
-            f"From: {self.train.source} To: {self.train.destination}\n"
+            f"Train: {train.name} ({train.train_no})\n"
+            f"From: {train.source} To: {train.destination}\n"
             f"Status: {self.status}\n"
-            f"Booking Date: {self.booking_date.strftime('%Y-%m-%d %H:%M:%S')}\n"
+            f"Booking Date: {self._booking_str}\n"
             f"Passengers:\n{passenger_details}\n"
             f"-----------------------------------"
         )
+        self._details_status = self.status
+        return self._details_cache
 
 class ReservationSystem:
     """
     Manages the overall reservation process, including trains and tickets.
     """
-    def __init__(self):
+    def __init__(self, db_path: Optional[str] = None) -> None:
         # Using dictionaries to store trains and tickets for quick lookups
-        self.trains = {}
-        self.tickets = {}
+        self.trains: dict[str, Train] = {}
+        self.tickets: dict[str, Ticket] = {}
+        # Secondary index: (source, destination) in lowercase -> list of trains
+        self.trains_by_route: dict[tuple[str, str], list[Train]] = {}
+        # Compact array of available seats per train, for fleet-wide reports
+        self._train_idx: dict[str, int] = {}
+        self._avail: array[int] = array("i")
+        # Optional SQLite backing store; the dictionaries above act as its cache
+        self.db: Optional[sqlite3.Connection] = None
+        if db_path is not None:
+            self.db = sqlite3.connect(db_path)
+            self._init_db(self.db)
+            self._load_from_db(self.db)
+
+    def _init_db(self, db: sqlite3.Connection) -> None:
+        """Creates the database schema if it does not exist yet."""
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS trains (
+                train_no TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                source TEXT NOT NULL,
+                destination TEXT NOT NULL,
+                total_seats INTEGER NOT NULL,
+                available_seats INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_trains_route
+                ON trains (lower(source), lower(destination));
+            CREATE TABLE IF NOT EXISTS tickets (
+                pnr TEXT PRIMARY KEY,
+                train_no TEXT NOT NULL REFERENCES trains (train_no),
+                status TEXT NOT NULL,
+                booking_date TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS passengers (
+                pnr TEXT NOT NULL REFERENCES tickets (pnr),
+                name TEXT NOT NULL,
+                age TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_passengers_pnr ON passengers (pnr);
+            CREATE TABLE IF NOT EXISTS waiting_list (
+                train_no TEXT NOT NULL REFERENCES trains (train_no),
+                pnr TEXT PRIMARY KEY REFERENCES tickets (pnr),
+                position INTEGER NOT NULL
+            );
+        """)
+
+    def _load_from_db(self, db: sqlite3.Connection) -> None:
+        """Loads all stored trains, tickets and waiting lists into memory."""
+        global _pnr_counter
+
+        for train_no, name, source, destination, total_seats, available_seats in db.execute(
+                "SELECT train_no, name, source, destination, total_seats, available_seats FROM trains"):
+            train = Train(train_no, name, source, destination, total_seats)
+            train.available_seats = available_seats
+            self._index_train(train)
+
+        passengers_by_pnr: dict[str, list[Passenger]] = {}
+        for pnr, name, age in db.execute("SELECT pnr, name, age FROM passengers ORDER BY rowid"):
+            passengers_by_pnr.setdefault(pnr, []).append(Passenger(name, age))
+
+        for pnr, train_no, status, booking_date in db.execute(
+                "SELECT pnr, train_no, status, booking_date FROM tickets"):
+            self.tickets[pnr] = Ticket(self.trains[train_no], passengers_by_pnr.get(pnr, []), pnr=pnr,
+                                       status=status, booking_date=datetime.datetime.fromisoformat(booking_date))
+        for train_no, pnr in db.execute("SELECT train_no, pnr FROM waiting_list ORDER BY position"):
+            self.trains[train_no].add_to_waiting_list(pnr)
+
+        # Continue PNR numbering past the stored tickets to avoid collisions
+        if self.tickets:
+            _pnr_counter = itertools.count(max(int(pnr) for pnr in self.tickets) + 1)
+
+    def _save_ticket(self, ticket: Ticket) -> None:
+        """Writes a new ticket, its passengers and waiting list entry to the database."""
+        if self.db is None:
+            return
+        train = ticket.train
+        self.db.execute("INSERT INTO tickets (pnr, train_no, status, booking_date) VALUES (?, ?, ?, ?)",
+                        (ticket.pnr, train.train_no, ticket.status, ticket.booking_date.isoformat()))
+        self.db.executemany("INSERT INTO passengers (pnr, name, age) VALUES (?, ?, ?)",
+                            [(ticket.pnr, p.name, p.age) for p in ticket.passengers])
+        if ticket.status == "Waiting":
+            # Stored positions only grow, so the queue order survives restarts
+            self.db.execute("INSERT INTO waiting_list (train_no, pnr, position) "
+                            "SELECT ?, ?, COALESCE(MAX(position), -1) + 1 FROM waiting_list",
+                            (train.train_no, ticket.pnr))
+        self.db.commit()
+
+    def _save_ticket_status(self, ticket: Ticket) -> None:
+        """Updates the stored status of a ticket and drops it from the waiting list if needed."""
+        if self.db is None:
+            return
+        self.db.execute("UPDATE tickets SET status = ? WHERE pnr = ?", (ticket.status, ticket.pnr))
+        if ticket.status != "Waiting":
+            self.db.execute("DELETE FROM waiting_list WHERE pnr = ?", (ticket.pnr,))
 
-    def add_train(self, train):
-        """Adds a new train to the system."""
+    def _save_seats(self, train: Train) -> None:
+        """Updates the stored seat availability of a train."""
+        if self.db is None:
+            return
+        self.db.execute("UPDATE trains SET available_seats = ? WHERE train_no = ?",
+                        (train.available_seats, train.train_no))
+
+    def _index_train(self, train: Train) -> None:
+        """Registers a train in the in-memory lookup structures."""
+        previous = self.trains.get(train.train_no)
+        if previous is not None:
+            # Replacing a train: drop the old one from its route
+            old_key = (previous._source_lc, previous._destination_lc)
+            self.trains_by_route[old_key].remove(previous)
+            if not self.trains_by_route[old_key]:
+                del self.trains_by_route[old_key]
+            previous._seat_array = None
         self.trains[train.train_no] = train
+        if train.train_no in self._train_idx:
+            slot = self._train_idx[train.train_no]
+            self._avail[slot] = train.available_seats
+        else:
+            slot = self._train_idx[train.train_no] = len(self._avail)
+            self._avail.append(train.available_seats)
+        train._seat_array = self._avail
+        train._seat_slot = slot
+        key = (train._source_lc, train._destination_lc)
+        self.trains_by_route.setdefault(key, []).append(train)
+
+    def add_train(self, train: Train) -> None:
+        """Adds a new train to the system."""
+        previous = self.trains.get(train.train_no)
+        if previous is not None and (previous.available_seats != previous.total_seats or previous.waiting_index):
+            # Tickets keep a reference to their train, so it cannot be swapped under them
+            print(f"Error: Train {train.train_no} has active bookings and cannot be replaced.")
+            return
+        self._index_train(train)
+        if self.db is not None:
+            with self.db:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO trains (train_no, name, source, destination, total_seats, available_seats) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (train.train_no, train.name, train.source, train.destination,
+                     train.total_seats, train.available_seats))
         print(f"Train '{train.name}' added successfully.")
 
-    def display_trains(self, source, destination):
+    def total_available(self) -> int:
+        """Returns the number of available seats across all trains."""
+        return sum(self._avail)
+
+    def display_trains(self, source: str, destination: str) -> None:
         """Displays available trains between a source and destination."""
         print(f"\n--- Trains from {source.upper()} to {destination.upper()} ---")
-        found_trains = False
-        for train_no, train in self.trains.items():
-            if train.source.lower() == source.lower() and train.destination.lower() == destination.lower():
-                print(f"{train.get_details()} | Available Seats: {train.check_availability()}")
-                found_trains = True
-        if not found_trains:
+        key = (normalize_station(source), normalize_station(destination))
+        matches = self.trains_by_route.get(key, [])
+        for train in matches:
+            print(f"{train.get_details()} | Available Seats: {train.check_availability()}")
+        if not matches:
             print("No trains found for the given route.")
         print("--------------------------------------------------")
 
-    def book_ticket(self):
+    def book_ticket(self) -> None:
         """Handles the ticket booking process."""
         source = input("Enter source station: ")
         destination = input("Enter destination station: ")
@@ -92,34 +355,48 @@ class ReservationSystem:
 
         selected_train = self.trains[train_no]
 
-        try:
-            num_passengers = int(input("Enter the number of passengers: "))
-            if num_passengers <= 0:
-                print("Error: Number of passengers must be positive.")
-                return
-        except ValueError:
-            print("Error: Invalid input. Please enter a number.")
+        num_input = input("Enter the number of passengers: ").strip()
+        if not _POSITIVE_INT_RE.match(num_input):
+            print("Error: Number of passengers must be a positive number.")
             return
-
-        passengers = []
-        for i in range(num_passengers):
-            name = input(f"Enter name for passenger {i + 1}: ")
-            age = input(f"Enter age for passenger {i + 1}: ")
-            passengers.append({"name": name, "age": age})
+        num_passengers = int(num_input)
+
+        passengers: list[Passenger] = []
+        if num_passengers > BATCH_PASSENGER_THRESHOLD:
+            # Large groups: accept a pasted block of 'name,age' lines
+            print("Enter passengers as 'name,age' one per line (blank line to finish):")
+            # Read up to the blank line so no extra lines leak into later prompts
+            for line in iter(input, ""):
+                name, sep, age = line.rpartition(",")
+                if not sep:
+                    print("Error: Each line must be in the form 'name,age'.")
+                    return
+                passengers.append(Passenger(name.strip(), age.strip()))
+            if len(passengers) != num_passengers:
+                print(f"Error: Expected {num_passengers} passengers, got {len(passengers)}.")
+                return
+        else:
+            for i in range(num_passengers):
+                name = input(f"Enter name for passenger {i + 1}: ")
+                age = input(f"Enter age for passenger {i + 1}: ")
+                passengers.append(Passenger(name, age))
 
         new_ticket = Ticket(selected_train, passengers)
         self.tickets[new_ticket.pnr] = new_ticket
 
         if new_ticket.status == "Confirmed":
-            selected_train.available_seats -= len(passengers)
+            selected_train.reserve_seats(new_ticket.seat_count)
             print("\nBooking Successful! Your ticket is confirmed.")
         else:
-            selected_train.waiting_list.append(new_ticket.pnr)
-            print(f"\nBooking Successful! Your ticket is on the waiting list (Position: {len(selected_train.waiting_list)}).")
+            selected_train.add_to_waiting_list(new_ticket.pnr)
+            print(f"\nBooking Successful! Your ticket is on the waiting list (Position: {selected_train.waiting_position(new_ticket.pnr)}).")
+
+        self._save_seats(selected_train)
+        self._save_ticket(new_ticket)
 
         print(new_ticket.get_details())
 
-    def cancel_ticket(self):
+    def cancel_ticket(self) -> None:
         """Handles the ticket cancellation process."""
         pnr_to_cancel = input("Enter PNR number to cancel: ")
         if pnr_to_cancel not in self.tickets:
@@ -132,29 +409,39 @@ class ReservationSystem:
             return
 
         train = ticket_to_cancel.train
-        num_passengers = len(ticket_to_cancel.passengers)
+
+        # Release the seats or the waiting list slot held by the ticket
+        if ticket_to_cancel.status == "Confirmed":
+            train.release_seats(ticket_to_cancel.seat_count)
+        else:
+            train.remove_from_waiting_list(pnr_to_cancel)
 
         # Mark ticket as cancelled
         ticket_to_cancel.status = "Cancelled"
+        self._save_ticket_status(ticket_to_cancel)
         print(f"\nTicket with PNR {pnr_to_cancel} has been cancelled.")
 
-        # If the cancelled ticket was confirmed, try to confirm a waiting list ticket
-        if ticket_to_cancel in self.tickets.values() and ticket_to_cancel.status != "Cancelled":
-             train.available_seats += num_passengers
-
-        if train.waiting_list:
-            # Check if now there are enough seats for the first person on the waiting list
-            pnr_from_wl = train.waiting_list[0]
+        while True:
+            # Confirm waiting list tickets in order while there are enough seats
+            pnr_from_wl = train.next_waiting()
+            if pnr_from_wl is None:
+                break
             ticket_to_confirm = self.tickets[pnr_from_wl]
-            
-            if train.available_seats >= len(ticket_to_confirm.passengers):
-                ticket_to_confirm.status = "Confirmed"
-                train.available_seats -= len(ticket_to_confirm.passengers)
-                train.waiting_list.pop(0) # Remove from waiting list
-                print(f"A ticket from the waiting list (PNR: {pnr_from_wl}) has been confirmed.")
+            if train.available_seats < ticket_to_confirm.seat_count:
+                break
+
+            train.pop_waiting_list() # Remove from waiting list
+            train.reserve_seats(ticket_to_confirm.seat_count)
+            ticket_to_confirm.status = "Confirmed"
+            self._save_ticket_status(ticket_to_confirm)
+            print(f"A ticket from the waiting list (PNR: {pnr_from_wl}) has been confirmed.")
+
+        self._save_seats(train)
+        if self.db is not None:
+            self.db.commit()
 
 
-    def check_pnr_status(self):
+    def check_pnr_status(self) -> None:
         """Checks and displays the status of a ticket using its PNR."""
         pnr_to_check = input("Enter PNR number: ")
         if pnr_to_check in self.tickets:
@@ -162,21 +449,27 @@ class ReservationSystem:
             print("\n--- PNR Status ---")
             print(ticket.get_details())
             if ticket.status == "Waiting":
-                position = ticket.train.waiting_list.index(pnr_to_check) + 1
+                position = ticket.train.waiting_position(pnr_to_check)
                 print(f"Current Waiting List Position: {position}")
         else:
             print("Error: Invalid PNR number.")
 
 
-def main():
+def main() -> None:
     """The main function to run the reservation system CLI."""
-    system = ReservationSystem()
+    system = ReservationSystem(DB_PATH)
 
     # Pre-populating the system with some trains for demonstration
-    system.add_train(Train("12028", "Shatabdi Express", "Bengaluru", "Chennai", 150))
-    system.add_train(Train("12627", "Karnataka Express", "Bengaluru", "New Delhi", 200))
-    system.add_train(Train("16526", "Kanyakumari Exp", "Bengaluru", "Kanyakumari", 180))
-    system.add_train(Train("12007", "Mysuru Shatabdi", "Chennai", "Mysuru", 150))
+    demo_trains = [
+        Train("12028", "Shatabdi Express", "Bengaluru", "Chennai", 150),
+        Train("12627", "Karnataka Express", "Bengaluru", "New Delhi", 200),
+        Train("16526", "Kanyakumari Exp", "Bengaluru", "Kanyakumari", 180),
+        Train("12007", "Mysuru Shatabdi", "Chennai", "Mysuru", 150),
+    ]
+    for train in demo_trains:
+        # Trains restored from the database keep their current seat counts
+        if train.train_no not in system.trains:
+            system.add_train(train)
 
     while True:
         print("\n===== Railway Reservation System =====")
@@ -186,11 +479,11 @@ def main():
         print("4. Display Available Trains")
         print("5. Exit")
 
-        try:
-            choice = int(input("Enter your choice (1-5): "))
-        except ValueError:
-            print("Invalid input. Please enter a number.")
+        choice_input = input("Enter your choice (1-5): ").strip()
+        if not _MENU_CHOICE_RE.match(choice_input):
+            print("Invalid choice. Please select from 1 to 5.")
             continue
+        choice = int(choice_input)
 
         if choice == 1:
             system.book_ticket()
@@ -205,8 +498,6 @@ def main():
         elif choice == 5:
             print("Thank you for using the Railway Reservation System.")
             break
-        else:
-            print("Invalid choice. Please select from 1 to 5.")
 
 if __name__ == "__main__":
     main()